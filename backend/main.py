@@ -1,26 +1,116 @@
-from fastapi import FastAPI
+import time
+from typing import List, Optional
+from fastapi import FastAPI, Query, Request
+from fastapi.responses import PlainTextResponse
 from backend.services.recommender import CarRecommender
+from backend.services.query_engine import QueryEngine
+from backend.services.deals import DEFAULT_COMPARABLES
+from backend.services.metrics import METRICS_ENABLED, observe_request, register_gauge, render_prometheus
+from backend.services.profiler import PROFILE_SLOW_SECONDS, profile_if_slow
 from fastapi import HTTPException
 
 
 app = FastAPI(title="Carvise.ai API")
 recommender = CarRecommender()
+query_engine = QueryEngine(recommender)
+_loaded_at = time.time()
+
+register_gauge("carvise_inventory_rows", "Listings loaded into the recommender", lambda: len(recommender.processed_data))
+register_gauge("carvise_model_features", "Features the price model was trained on", lambda: len(recommender.feature_columns))
+register_gauge("carvise_model_estimators", "Trees in the price model", lambda: getattr(recommender.model, "n_estimators", 0))
+register_gauge("carvise_model_loaded_timestamp_seconds", "Unix time the model was loaded", lambda: _loaded_at)
+
+async def instrument_requests(request: Request, call_next):
+    start = time.perf_counter()
+    with profile_if_slow("unmatched") as profiler:
+        response = await call_next(request)
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        if profiler is not None:
+            profiler.name = route
+    observe_request(route, time.perf_counter() - start)
+    return response
+
+# Only wrap requests when there is something to record
+if METRICS_ENABLED or PROFILE_SLOW_SECONDS is not None:
+    app.middleware("http")(instrument_requests)
 
 @app.get("/")
 def read_root():
     return {"message": "Welcome to Carvise.ai!"}
 
 @app.get("/recommendations")
-def get_recommendations(budget: int, family_size: int):
+def get_recommendations(
+    budget: int,
+    family_size: int,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500)
+):
     try:
-        recommendations = recommender.recommend(budget, family_size)
+        page = recommender.recommend_page(budget, family_size, offset=offset, limit=limit)
+        recommendations = page["results"]
         return {
             "status": "success",
             "count": len(recommendations),
+            "total": page["total"],
+            "offset": offset,
+            "limit": limit,
             "recommendations": recommendations
         }
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=str(e)
-        )
\ No newline at end of file
+        )
+
+@app.get("/search")
+def search(
+    budget: Optional[float] = None,
+    family_size: Optional[int] = None,
+    year_min: Optional[int] = None,
+    year_max: Optional[int] = None,
+    max_kilometres: Optional[float] = None,
+    make: Optional[List[str]] = Query(None),
+    body_type: Optional[List[str]] = Query(None),
+    max_l_per_100km: Optional[float] = None,
+    city: Optional[str] = None,
+    radius_km: Optional[float] = Query(None, gt=0),
+    max_price: Optional[float] = None,
+    best_deals: bool = False,
+    comparables: int = Query(0, ge=0, le=DEFAULT_COMPARABLES),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500)
+):
+    try:
+        page = query_engine.search(
+            budget=budget,
+            seats=family_size,
+            year_min=year_min,
+            year_max=year_max,
+            max_kilometres=max_kilometres,
+            make=make,
+            body_type=body_type,
+            max_l_per_100km=max_l_per_100km,
+            city=city,
+            radius_km=radius_km,
+            max_price=max_price,
+            best_deals=best_deals,
+            comparables=comparables,
+            offset=offset,
+            limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {
+        "status": "success",
+        "count": len(page["results"]),
+        "total": page["total"],
+        "offset": offset,
+        "limit": limit,
+        "recommendations": page["results"]
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
@@ -10,6 +10,6 @@ class Car(Base):
     model = Column(String)
     year = Column(Integer)
     price = Column(Float)
-    'l/100km' = Column(Float)
+    l_per_100km = Column('l/100km', Float)
     seats = Column(Integer)
     body_type = Column(String)
\ No newline at end of file
@@ -0,0 +1,86 @@
+import pandas as pd
+import numpy as np
+from sklearn.neighbors import KDTree
+
+DEFAULT_COMPARABLES = 5
+
+
+class DealIndex:
+    """Listing-vs-model price residuals and nearest comparables, built once at load.
+
+    deal_score is predicted minus listed price, so a positive score means the
+    car is listed below what the model thinks it's worth.
+
+    Comparables are the closest listings by standardized year and kilometres,
+    looked up with KD-trees when the index is built, so serving them is just an
+    array read. They come from the same make and base model first. If that group
+    has too few other listings, the remaining slots come from the same make,
+    and after that from the whole inventory.
+    """
+
+    def __init__(self, listed_price, predicted_price, year, kilometres, make, model,
+                 k=DEFAULT_COMPARABLES):
+        listed_price = np.asarray(listed_price, dtype=float)
+        self.deal_score = np.asarray(predicted_price, dtype=float) - listed_price
+
+        # Best deals first; rows without a listed price sort last
+        ranked = np.where(np.isnan(self.deal_score), -np.inf, self.deal_score)
+        self.order = np.argsort(-ranked, kind='stable')
+
+        self.k = min(k, max(len(listed_price) - 1, 0))
+        self.comparables = self._nearest(year, kilometres, make, model)
+
+    def _nearest(self, year, kilometres, make, model):
+        size = len(self.order)
+        comparables = np.full((size, self.k), -1, dtype=np.int32)
+        filled = np.zeros(size, dtype=int)
+        if self.k == 0:
+            return comparables
+
+        points = np.column_stack([self._standardize(year), self._standardize(kilometres)])
+        make_key = pd.Series(make).astype(str).str.lower().to_numpy()
+        base_model = pd.Series(model).astype(str).str.split().str[0].str.lower().to_numpy()
+        model_key = make_key + '|' + base_model
+
+        # Same make and model, then same make, then anything
+        for keys in (model_key, make_key, np.zeros(size, dtype=int)):
+            for rows in pd.Series(keys).groupby(keys, sort=False).indices.values():
+                need = rows[filled[rows] < self.k]
+                if len(rows) > 1 and len(need):
+                    self._fill_from(rows, need, points, comparables, filled)
+        return comparables
+
+    def _fill_from(self, rows, need, points, comparables, filled):
+        """Top up comparables for `need` with the nearest rows of one group"""
+        # Earlier picks all lie inside this group, so asking for that many
+        # extra neighbours (plus the row itself) always leaves enough new ones
+        k_query = min(len(rows), self.k + 1 + filled[need].max())
+        _, neighbours = KDTree(points[rows]).query(points[need], k=k_query)
+        candidates = rows[neighbours]
+
+        if k_query == self.k + 1 and not filled[need].any():
+            # Common case: a fresh, large enough group - drop each row from
+            # its own list (not always column 0 when duplicates tie)
+            is_self = candidates == need[:, None]
+            is_self[~is_self.any(axis=1), -1] = True
+            comparables[need] = candidates[~is_self].reshape(len(need), self.k)
+            filled[need] = self.k
+            return
+
+        for row, row_candidates in zip(need, candidates):
+            taken = set(comparables[row, :filled[row]])
+            new = [c for c in row_candidates if c != row and c not in taken]
+            new = new[:self.k - filled[row]]
+            comparables[row, filled[row]:filled[row] + len(new)] = new
+            filled[row] += len(new)
+
+    @staticmethod
+    def _standardize(values):
+        values = np.asarray(values, dtype=float)
+        values = np.where(np.isnan(values), np.nanmedian(values), values)
+        std = values.std()
+        return (values - values.mean()) / std if std else np.zeros_like(values)
+
+    def best_first(self, mask):
+        """Row ids selected by a boolean inventory mask, best deal first"""
+        return self.order[mask[self.order]]
@@ -0,0 +1,132 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+
+# Metrics are on by default; set CARVISE_METRICS=0 to turn every timer into a no-op
+METRICS_ENABLED = os.getenv("CARVISE_METRICS", "1") != "0"
+
+# Seconds - tuned for sub-millisecond stages up to multi-second requests
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram in Prometheus layout"""
+
+    def __init__(self, name, help_text, label_name=None, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_name = label_name
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, label=None):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label)
+            if series is None:
+                series = self._series[label] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} histogram"
+        ]
+        with self._lock:
+            snapshot = {k: (list(v[0]), v[1], v[2]) for k, v in self._series.items()}
+
+        for label, (counts, total, count) in sorted(snapshot.items(), key=lambda kv: str(kv[0])):
+            prefix = f'{self.label_name}="{label}",' if self.label_name else ""
+            running = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                running += bucket_count
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {running}')
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {count}')
+            suffix = f"{{{prefix.rstrip(',')}}}" if prefix else ""
+            lines.append(f"{self.name}_sum{suffix} {total}")
+            lines.append(f"{self.name}_count{suffix} {count}")
+        return lines
+
+
+class Gauge:
+    """Point-in-time value, read lazily from a callable at scrape time"""
+
+    def __init__(self, name, help_text, read):
+        self.name = name
+        self.help_text = help_text
+        self.read = read
+
+    def render(self):
+        return [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} gauge",
+            f"{self.name} {float(self.read())}"
+        ]
+
+
+stage_latency = Histogram(
+    "carvise_recommender_stage_seconds",
+    "Time spent in each CarRecommender stage",
+    label_name="stage"
+)
+query_stage_latency = Histogram(
+    "carvise_query_stage_seconds",
+    "Time spent in each QueryEngine stage",
+    label_name="stage"
+)
+request_latency = Histogram(
+    "carvise_request_seconds",
+    "End-to-end latency of API requests",
+    label_name="endpoint"
+)
+_gauges = []
+
+
+def register_gauge(name, help_text, read):
+    """Expose a callable as a gauge on /metrics"""
+    _gauges.append(Gauge(name, help_text, read))
+
+
+@contextmanager
+def _timed(histogram, label):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.observe(time.perf_counter() - start, label)
+
+
+def stage_timer(stage):
+    """Time one recommender stage (no-op when metrics are disabled)"""
+    if not METRICS_ENABLED:
+        return nullcontext()
+    return _timed(stage_latency, stage)
+
+
+def query_stage_timer(stage):
+    """Time one query engine stage (no-op when metrics are disabled)"""
+    if not METRICS_ENABLED:
+        return nullcontext()
+    return _timed(query_stage_latency, stage)
+
+
+def observe_request(endpoint, seconds):
+    """Record one API request's end-to-end latency"""
+    if METRICS_ENABLED:
+        request_latency.observe(seconds, endpoint)
+
+
+def render_prometheus():
+    """Render every metric in the Prometheus text exposition format"""
+    lines = []
+    for metric in (request_latency, stage_latency, query_stage_latency, *_gauges):
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
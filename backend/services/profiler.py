@@ -0,0 +1,80 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import nullcontext
+from pathlib import Path
+
+# Opt-in: set CARVISE_PROFILE_SLOW_MS to dump a profile for requests slower than that
+_slow_ms = os.getenv("CARVISE_PROFILE_SLOW_MS")
+PROFILE_SLOW_SECONDS = float(_slow_ms) / 1000 if _slow_ms else None
+PROFILE_INTERVAL_SECONDS = float(os.getenv("CARVISE_PROFILE_INTERVAL_MS", "1")) / 1000
+PROFILE_DIR = Path(os.getenv("CARVISE_PROFILE_DIR", "profiles"))
+
+
+class SamplingProfiler:
+    """Samples every thread's stack on a background thread while active.
+
+    A request spans the event loop and the worker thread its sync endpoint
+    runs in, so all threads are sampled and each stack is rooted at its
+    thread name. Other requests in flight at the same time show up too.
+    Stacks are kept in collapsed form ("outer;inner;leaf count"), which
+    flamegraph.pl, speedscope and inferno read directly.
+    """
+
+    def __init__(self, name, slow_seconds, interval=PROFILE_INTERVAL_SECONDS, out_dir=PROFILE_DIR):
+        self.name = name
+        self.slow_seconds = slow_seconds
+        self.interval = interval
+        self.out_dir = Path(out_dir)
+        self.samples = Counter()
+        self._stop = threading.Event()
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        elapsed = time.perf_counter() - self._start
+        if elapsed >= self.slow_seconds and self.samples:
+            self._dump(elapsed)
+        return False
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.samples[";".join(reversed(stack))] += 1
+
+    def _dump(self, elapsed):
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        name = self.name.strip("/").replace("/", "_") or "root"
+        path = self.out_dir / f"{name}-{int(time.time() * 1000)}-{elapsed * 1000:.0f}ms.folded"
+        with open(path, "w") as fh:
+            for stack, count in self.samples.most_common():
+                fh.write(f"{stack} {count}\n")
+
+
+def profile_if_slow(name):
+    """Profile the current request when CARVISE_PROFILE_SLOW_MS is set.
+
+    The context value is the profiler (None when disabled) so the caller can
+    rename the dump once the route is known.
+    """
+    if PROFILE_SLOW_SECONDS is None:
+        return nullcontext()
+    return SamplingProfiler(name, PROFILE_SLOW_SECONDS)
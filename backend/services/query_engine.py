@@ -0,0 +1,355 @@
+import pandas as pd
+import numpy as np
+from pathlib import Path
+from urllib.parse import unquote
+from .metrics import query_stage_timer
+from .deals import DealIndex
+
+EARTH_RADIUS_KM = 6371.0
+# Above this share of the inventory a filter is cheaper to evaluate as a
+# full-column mask than by gathering candidate rows
+DENSE_FRACTION = 0.125
+INTEGER_COLUMNS = ('year', 'seats')
+COMPARABLE_COLUMNS = ('title', 'year', 'kilometres', 'price', 'predicted_price', 'deal_score')
+
+
+class SortedIndex:
+    """Row ids ordered by one numeric column; range lookups are two binary searches"""
+
+    def __init__(self, values):
+        self.values = np.asarray(values, dtype=float)
+        valid_rows = np.flatnonzero(~np.isnan(self.values))
+        self.order = valid_rows[np.argsort(self.values[valid_rows], kind='stable')]
+        self.sorted_values = self.values[self.order]
+
+    def _bounds(self, low, high):
+        start = 0 if low is None else np.searchsorted(self.sorted_values, low, side='left')
+        stop = len(self.order) if high is None else np.searchsorted(self.sorted_values, high, side='right')
+        return start, max(start, stop)
+
+    def count(self, low, high):
+        start, stop = self._bounds(low, high)
+        return stop - start
+
+    def row_ids(self, low, high):
+        start, stop = self._bounds(low, high)
+        return self.order[start:stop]
+
+    def matches(self, row_ids, low, high):
+        return self._compare(self.values[row_ids], low, high)
+
+    def mask(self, low, high):
+        return self._compare(self.values, low, high)
+
+    @staticmethod
+    def _compare(values, low, high):
+        # NaN compares False, so rows without a value never match
+        mask = np.ones(len(values), dtype=bool)
+        if low is not None:
+            mask &= values >= low
+        if high is not None:
+            mask &= values <= high
+        return mask
+
+
+class BitmapIndex:
+    """One bitmap per distinct value of a categorical column (case-insensitive)"""
+
+    def __init__(self, values):
+        keys = pd.Series(values).astype('string').str.strip().str.lower()
+        codes, self.categories = pd.factorize(keys, use_na_sentinel=True)
+        self.codes = codes
+        self.lookup = {value: code for code, value in enumerate(self.categories)}
+        self.bitmaps = [codes == code for code in range(len(self.categories))]
+        self.counts = np.array([bitmap.sum() for bitmap in self.bitmaps], dtype=int)
+        # Queries AND masks together in place; make any write into the index fail loudly
+        for bitmap in self.bitmaps:
+            bitmap.flags.writeable = False
+
+    def _codes_for(self, wanted):
+        return [self.lookup[v] for v in (w.strip().lower() for w in wanted) if v in self.lookup]
+
+    def count(self, wanted):
+        return int(self.counts[self._codes_for(wanted)].sum())
+
+    def row_ids(self, wanted):
+        return np.flatnonzero(self.mask(wanted))
+
+    def mask(self, wanted):
+        """Fresh mask of matching rows; callers may modify it"""
+        codes = self._codes_for(wanted)
+        if not codes:
+            return np.zeros(len(self.codes), dtype=bool)
+        bitmap = self.bitmaps[codes[0]].copy()
+        for code in codes[1:]:
+            bitmap |= self.bitmaps[code]
+        return bitmap
+
+    def matches(self, row_ids, wanted):
+        return np.isin(self.codes[row_ids], self._codes_for(wanted))
+
+
+class GeoIndex:
+    """Listings grouped by location; distances are computed once per distinct place"""
+
+    def __init__(self, lat, lon):
+        coords = np.column_stack([lat, lon]).astype(float)
+        known = ~np.isnan(coords).any(axis=1)
+        places, known_codes = np.unique(coords[known], axis=0, return_inverse=True)
+
+        # Listings with no known location get code -1, the trailing "never within" slot
+        self.codes = np.full(len(coords), -1, dtype=np.intp)
+        self.codes[known] = known_codes.ravel()
+        self.lat = np.radians(places[:, 0])
+        self.lon = np.radians(places[:, 1])
+        self.counts = np.bincount(known_codes.ravel(), minlength=len(places))
+
+    def _within(self, origin, radius_km):
+        within = np.zeros(len(self.lat) + 1, dtype=bool)
+        within[:-1] = self._place_distances(origin) <= radius_km
+        return within
+
+    def count(self, origin, radius_km):
+        return int(self.counts[self._within(origin, radius_km)[:-1]].sum())
+
+    def row_ids(self, origin, radius_km):
+        return np.flatnonzero(self.mask(origin, radius_km))
+
+    def matches(self, row_ids, origin, radius_km):
+        return self._within(origin, radius_km)[self.codes[row_ids]]
+
+    def mask(self, origin, radius_km):
+        return self._within(origin, radius_km)[self.codes]
+
+    def distance_km(self, row_ids, origin):
+        distances = np.append(self._place_distances(origin), np.nan)
+        return distances[self.codes[row_ids]]
+
+    def _place_distances(self, origin):
+        lat0, lon0 = np.radians(origin[0]), np.radians(origin[1])
+        a = (
+            np.sin((self.lat - lat0) / 2) ** 2 +
+            np.cos(lat0) * np.cos(self.lat) * np.sin((self.lon - lon0) / 2) ** 2
+        )
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+class Locations:
+    """Approximate coordinates for the Ontario cities listings come from"""
+
+    def __init__(self, geo_dir):
+        city_path = geo_dir / "city_coords.csv"
+
+        self.cities = {}
+        if city_path.exists():
+            cities = pd.read_csv(city_path)
+            self.cities = {
+                (row.city, row.province): (row.lat, row.lon)
+                for row in cities.itertuples(index=False)
+            }
+
+    def listing_coords(self, urls):
+        """Look up coordinates from the city/province segments of AutoTrader URLs"""
+        # https://www.autotrader.ca/a/<make>/<model>/<city>/<province>/<id>/
+        parts = urls.astype(str).str.split('/')
+        keys = parts.apply(
+            lambda p: (unquote(p[6]).lower(), unquote(p[7]).lower()) if len(p) > 7 else None
+        )
+        coords = keys.map(lambda key: self.cities.get(key, (np.nan, np.nan)))
+        return np.array([c[0] for c in coords]), np.array([c[1] for c in coords])
+
+    def resolve(self, city):
+        """Resolve an Ontario city name to (lat, lon)"""
+        key = (city.strip().lower(), 'ontario')
+        if key not in self.cities:
+            raise ValueError(f"Unknown city: {city}")
+        return self.cities[key]
+
+
+class QueryEngine:
+    """Multi-criteria search over the recommender's inventory.
+
+    Every filterable column is indexed once at build time. A query estimates
+    how many rows each filter keeps and starts from the most selective one.
+    If that leaves few rows, only those are checked against the remaining
+    filters. Otherwise every filter is evaluated as a full-column mask. Either
+    way the result is a mask over the inventory, and only the requested page
+    is read from it.
+    """
+
+    def __init__(self, recommender):
+        base_dir = Path(__file__).parent.parent.parent
+        self.locations = Locations(base_dir / "scraping" / "data" / "geo")
+
+        raw = recommender.raw_data
+        data = recommender.processed_data
+        self.size = len(data)
+
+        # Priced once by the recommender at load
+        predicted_price = data['predicted_price']
+
+        titles = raw['title'].astype(str)
+        make, model = recommender._split_make_model(titles)
+
+        listed_price = pd.to_numeric(
+            raw['price'].astype(str).str.replace(r'[^\d.]', '', regex=True),
+            errors='coerce'
+        )
+        lat, lon = self.locations.listing_coords(raw['url'])
+        fuel_economy = (
+            raw['city_fuel_economy']
+            .astype(str)
+            .str.extractall(r'(\d+(?:\.\d+)?)L')[0]
+            .astype(float)
+            .groupby(level=0).max()  # upper end of "10.3L - 10.9L/100km" ranges
+            .reindex(raw.index)
+        )
+
+        self.sorted_indexes = {
+            'predicted_price': SortedIndex(predicted_price),
+            'price': SortedIndex(listed_price),
+            'seats': SortedIndex(data['seats']),
+            'year': SortedIndex(data['year']),
+            'kilometres': SortedIndex(data['kilometres']),
+            'l/100km': SortedIndex(fuel_economy),
+        }
+        self.bitmap_indexes = {
+            'make': BitmapIndex(make),
+            'body_type': BitmapIndex(raw['body_type']),
+        }
+        self.geo_index = GeoIndex(lat, lon)
+        self.deals = DealIndex(
+            listed_price, predicted_price, data['year'], data['kilometres'], make, model
+        )
+
+        self.columns = {
+            'title': titles.to_numpy(),
+            'make': make.to_numpy(),
+            'model': model.to_numpy(),
+            'year': self.sorted_indexes['year'].values,
+            'predicted_price': self.sorted_indexes['predicted_price'].values,
+            'price': self.sorted_indexes['price'].values,
+            'deal_score': self.deals.deal_score,
+            'kilometres': self.sorted_indexes['kilometres'].values,
+            'seats': self.sorted_indexes['seats'].values,
+            'body_type': raw['body_type'].to_numpy(),
+            'l/100km': self.sorted_indexes['l/100km'].values,
+        }
+
+    def search(self, budget=None, seats=None, year_min=None, year_max=None,
+               max_kilometres=None, make=None, body_type=None, max_l_per_100km=None,
+               city=None, radius_km=None, max_price=None,
+               best_deals=False, comparables=0, offset=0, limit=None):
+        """Return {'total', 'results'} for listings matching every given filter.
+
+        city adds distance_km to each result and, with radius_km, limits matches
+        to that distance. best_deals ranks matches by deal score instead of
+        inventory order, and comparables attaches up to that many precomputed
+        similar listings.
+        """
+        with query_stage_timer('plan'):
+            filters, origin = self._build_filters(
+                budget, seats, year_min, year_max, max_kilometres, make,
+                body_type, max_l_per_100km, city, radius_km, max_price
+            )
+            # Cheapest plan: most selective filter first
+            filters.sort(key=lambda f: f[0].count(*f[1]))
+
+        with query_stage_timer('filter'):
+            mask = self._match_mask(filters)
+            if mask is None:
+                row_ids = self.deals.order if best_deals else np.arange(self.size)
+            elif best_deals:
+                row_ids = self.deals.best_first(mask)
+            else:
+                row_ids = np.flatnonzero(mask)  # inventory order
+
+        with query_stage_timer('serialize'):
+            stop = None if limit is None else offset + limit
+            page = row_ids[offset:stop]
+            results = self._records(page)
+            if origin is not None:
+                distances = self.geo_index.distance_km(page, origin)
+                for record, distance in zip(results, distances):
+                    record['distance_km'] = round(float(distance), 1)
+            if comparables:
+                neighbours = self.deals.comparables[page, :comparables]
+                for record, neighbour_ids in zip(results, neighbours):
+                    record['comparables'] = self._records(neighbour_ids, COMPARABLE_COLUMNS)
+
+        return {
+            'total': int(len(row_ids)),
+            'results': results
+        }
+
+    def _match_mask(self, filters):
+        """Mask of rows passing every (count-sorted) filter, or None for no filters"""
+        if not filters:
+            return None
+
+        index, args = filters[0]
+        if index.count(*args) > self.size * DENSE_FRACTION:
+            mask = index.mask(*args)
+            for index, args in filters[1:]:
+                mask &= index.mask(*args)
+            return mask
+
+        row_ids = index.row_ids(*args)
+        for index, args in filters[1:]:
+            if not len(row_ids):
+                break
+            row_ids = row_ids[index.matches(row_ids, *args)]
+        mask = np.zeros(self.size, dtype=bool)
+        mask[row_ids] = True
+        return mask
+
+    def _build_filters(self, budget, seats, year_min, year_max, max_kilometres, make,
+                       body_type, max_l_per_100km, city, radius_km, max_price):
+        """Turn request parameters into (index, args) pairs plus the geo origin"""
+        filters = []
+        origin = None
+        ranges = [
+            ('predicted_price', None, budget),
+            ('price', None, max_price),
+            ('seats', seats, None),
+            ('year', year_min, year_max),
+            ('kilometres', None, max_kilometres),
+            ('l/100km', None, max_l_per_100km),
+        ]
+        for column, low, high in ranges:
+            if low is not None or high is not None:
+                filters.append((self.sorted_indexes[column], (low, high)))
+
+        for column, wanted in (('make', make), ('body_type', body_type)):
+            if wanted:
+                wanted = [wanted] if isinstance(wanted, str) else list(wanted)
+                filters.append((self.bitmap_indexes[column], (wanted,)))
+
+        if city:
+            origin = self.locations.resolve(city)
+        if radius_km is not None:
+            if origin is None:
+                raise ValueError("radius_km needs a city")
+            filters.append((self.geo_index, (origin, radius_km)))
+
+        return filters, origin
+
+    def _records(self, row_ids, columns=None):
+        columns = columns or tuple(self.columns)
+        records = []
+        for i in row_ids:
+            record = {name: self._plain(self.columns[name][i]) for name in columns}
+            for name in INTEGER_COLUMNS:
+                if record.get(name) is not None:
+                    record[name] = int(record[name])
+            records.append(record)
+        return records
+
+    @staticmethod
+    def _plain(value):
+        """Convert numpy scalars/NaN into JSON-friendly Python values"""
+        if isinstance(value, np.generic):
+            value = value.item()
+        if isinstance(value, float) and np.isnan(value):
+            return None
+        return value
@@ -2,6 +2,7 @@ import pandas as pd
 import joblib
 from pathlib import Path
 import numpy as np
+from .metrics import stage_timer
 
 class CarRecommender:
     def __init__(self):
@@ -23,6 +24,12 @@ class CarRecommender:
         # Add seat data (if missing)
         if 'seats' not in self.processed_data.columns:
             self._estimate_seats()
+        
+        # Predictions don't depend on the request, so price the inventory once
+        with stage_timer('feature_selection'):
+            X = self.processed_data[self.feature_columns]
+        with stage_timer('predict'):
+            self.processed_data['predicted_price'] = self.model.predict(X)
     
     def _preprocess_data(self):
         """Replicate exact training preprocessing"""
@@ -89,33 +96,51 @@ class CarRecommender:
     
     def recommend(self, budget: float, seats: int):
         """Generate recommendations"""
-        # 1. Predict prices
-        X = self.processed_data[self.feature_columns]
-        self.processed_data['predicted_price'] = self.model.predict(X)
+        return self.recommend_page(budget, seats)['results']
+
+    def recommend_page(self, budget: float, seats: int, offset: int = 0, limit: int = None):
+        """Generate one page of recommendations plus the total match count"""
+        # 1. Filter results against the prices predicted at load
+        with stage_timer('filter'):
+            valid_mask = (
+                (self.processed_data['predicted_price'] <= budget) &
+                (self.processed_data['seats'] >= seats)
+            )
+            total = int(valid_mask.sum())
+            
+            # 2. Slice the page before doing any per-row string work
+            stop = None if limit is None else offset + limit
+            valid_cars = self.processed_data[valid_mask].iloc[offset:stop].copy()
         
-        # 2. Filter results
-        valid_mask = (
-            (self.processed_data['predicted_price'] <= budget) &
-            (self.processed_data['seats'] >= seats)
-        )
-        valid_cars = self.processed_data[valid_mask].copy()
+        with stage_timer('parse'):
+            # 3. Split make/model out of the title
+            valid_cars['make'], valid_cars['model'] = self._split_make_model(valid_cars['title'])
+        
+        with stage_timer('serialize'):
+            results = valid_cars[[
+                'title', 'make', 'model', 'year', 
+                'predicted_price', 'kilometres', 'seats'
+            ]].to_dict(orient='records')
         
-        # 3. Create make_model safely
-        valid_cars['make_model'] = (
-            valid_cars['title']
+        return {
+            'total': total,
+            'results': results
+        }
+    
+    @staticmethod
+    def _split_make_model(title_series):
+        """Display make/model from titles, with fallbacks for unparsable ones"""
+        make_model = (
+            title_series
+            .astype(str)
             .str.extract(r'\d{4}\s+(.+)$', expand=False)  # Capture everything after year
             .fillna('Unknown Make/Model')
         )
-        
-        # 4. Split make_model with fallbacks
-        split_result = valid_cars['make_model'].str.split(n=1, expand=True)
-        valid_cars['make'] = split_result[0].fillna('Unknown')
-        valid_cars['model'] = split_result[1].fillna('Model')
-        
-        return valid_cars[[
-            'title', 'make', 'model', 'year', 
-            'predicted_price', 'kilometres', 'seats'
-        ]].to_dict(orient='records')
+        split_result = make_model.str.split(n=1, expand=True)
+        missing = pd.Series(None, index=title_series.index, dtype=object)
+        make = split_result.get(0, missing).fillna('Unknown')
+        model = split_result.get(1, missing).fillna('Model')
+        return make, model
     
     def _parse_title(self, title_series):
         """Robust make/model extraction from titles"""
@@ -1,7 +1,12 @@
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
 import pandas as pd
 
+API_URL = "http://127.0.0.1:8000/recommendations"
+PAGE_SIZE = 50
+CACHE_TTL_SECONDS = 300
+
 # Set page configuration
 st.set_page_config(
     page_title="Carvise.ai - AI Car Buying Assistant",
@@ -100,54 +105,87 @@ with col2:
 # Add some space
 st.markdown("<div class='section-divider'></div>", unsafe_allow_html=True)
 
-# Find My Car button
+@st.cache_resource
+def get_http_session():
+    """Shared HTTP session so reruns reuse pooled keep-alive connections"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def fetch_recommendations(budget, seats, offset=0, limit=PAGE_SIZE):
+    """Fetch one page of recommendations, cached per (budget, seats, page)"""
+    response = get_http_session().get(
+        API_URL,
+        params={"budget": budget, "family_size": seats, "offset": offset, "limit": limit},
+        timeout=5
+    )
+    
+    if response.status_code != 200:
+        raise RuntimeError(f"API Error ({response.status_code}): {response.text}")
+        
+    data = response.json()
+    
+    if not isinstance(data.get("recommendations"), list):
+        raise RuntimeError("Invalid response format from server")
+    
+    return data
+
+def render_car_cards(cars):
+    """Build every card as one HTML block so the page does a single render"""
+    cards = []
+    for car in cars:
+        make = car.get('make', 'Unknown')
+        model = car.get('model', 'Unknown')
+        price = car.get('predicted_price') or 0
+        year = car.get('year', 'N/A')
+        mileage = car.get('kilometres') or 0
+        car_seats = car.get('seats', 'N/A')
+        
+        cards.append(f"""
+        <div class="car-card">
+            <div class="car-title">{make} {model}</div>
+            <div class="car-price">${price:,.2f}</div>
+            <div class="car-detail">🗓️ <strong>Year:</strong> {year}</div>
+            <div class="car-detail">🛣️ <strong>Mileage:</strong> {mileage:,.0f} km</div>
+            <div class="car-detail">👥 <strong>Seats:</strong> {car_seats}</div>
+        </div>
+        """)
+    st.markdown("".join(cards), unsafe_allow_html=True)
+
+# Find My Car button starts a new search; "Load more" only grows the page count
 if st.button("Find My Car"):
+    st.session_state["query"] = (budget, seats)
+    st.session_state["pages"] = 1
+
+if "query" in st.session_state:
+    query_budget, query_seats = st.session_state["query"]
     with st.spinner("🔍 Searching for the perfect car for you..."):
         try:
-            response = requests.get(
-                "http://127.0.0.1:8000/recommendations",
-                params={"budget": budget, "family_size": seats},
-                timeout=5
-            )
-            
-            if response.status_code != 200:
-                st.error(f"API Error ({response.status_code}): {response.text}")
-                st.stop()
-                
-            data = response.json()
-            
-            if not isinstance(data.get("recommendations"), list):
-                st.error("Invalid response format from server")
-                st.stop()
-                
-            recommendations = data["recommendations"]
+            recommendations = []
+            total = 0
+            for page in range(st.session_state["pages"]):
+                data = fetch_recommendations(query_budget, query_seats, offset=page * PAGE_SIZE)
+                recommendations.extend(data["recommendations"])
+                total = data.get("total", len(recommendations))
             
             if not recommendations:
                 st.warning("No cars found matching your criteria. Try adjusting your budget or seat requirements.")
                 st.stop()
             
             # Success message
-            st.markdown(f"<div class='success-message'>✅ Found {len(recommendations)} matching cars!</div>", unsafe_allow_html=True)
+            st.markdown(f"<div class='success-message'>✅ Found {total} matching cars!</div>", unsafe_allow_html=True)
             
             # Display results in a more visually appealing way
-            for car in recommendations:
-                make = car.get('make', 'Unknown')
-                model = car.get('model', 'Unknown')
-                price = car.get('predicted_price', 0)
-                year = car.get('year', 'N/A')
-                mileage = car.get('kilometres', 0)
-                car_seats = car.get('seats', 'N/A')
-                
-                # Create a card for each car
-                st.markdown(f"""
-                <div class="car-card">
-                    <div class="car-title">{make} {model}</div>
-                    <div class="car-price">${price:,.2f}</div>
-                    <div class="car-detail">🗓️ <strong>Year:</strong> {year}</div>
-                    <div class="car-detail">🛣️ <strong>Mileage:</strong> {mileage:,.0f} km</div>
-                    <div class="car-detail">👥 <strong>Seats:</strong> {car_seats}</div>
-                </div>
-                """, unsafe_allow_html=True)
+            render_car_cards(recommendations)
+            
+            if len(recommendations) < total:
+                st.caption(f"Showing {len(recommendations)} of {total}")
+                if st.button("Load more"):
+                    st.session_state["pages"] += 1
+                    st.rerun()
                 
         except Exception as e:
             st.error(f"Error occurred: {str(e)}")